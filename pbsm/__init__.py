@@ -3,12 +3,31 @@
 __author__ = "Andreas Lehn"
 from .version import __version__
 
+import re
+import sys
+import time
+
 from antlr4 import Token
 from .Lexer import Lexer
 
+# string prefixes accepted by the STRING rule of Lexer.g4
+STRING_PREFIX = re.compile(r'[fF][rR]|[rR][fF]|[bB][rR]|[rR][bB]|[uUfFrRbB]')
+
+class LimitExceeded(RuntimeError):
+    """raised when the interpreter exceeds one of its execution limits"""
+
+class Exit(Exception):
+    """raised by the exit commands to terminate the running program"""
+    def __init__(self, code=None):
+        super().__init__(code)
+        self.code = code
+
 class Interpreter:
 
-    def __init__(self, verbose=False):
+    # number of steps between two checks of the wall-clock deadline
+    CLOCK_INTERVAL = 1024
+
+    def __init__(self, verbose=False, max_steps=None, max_stack=None, max_depth=None, max_size=None, timeout=None):
         self.stack = []
         self.symbol_tables = []
         self.register({ 
@@ -27,7 +46,15 @@ class Interpreter:
             'cvx': Interpreter.cvx
         })
         self.deffered_mode = 0
+        self.proc_starts = []
         self.verbose = verbose
+        self.max_steps = max_steps
+        self.max_stack = max_stack
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.timeout = timeout
+        self.depth = 0
+        self.reset_limits()
 
     def register(self, commands):
         if not isinstance(commands, dict):
@@ -47,14 +74,58 @@ class Interpreter:
     def in_deffered_mode(self):
         return self.deffered_mode > 0
     
+    def reset_limits(self):
+        """restart the step counter and the wall-clock deadline"""
+        self.steps = 0
+        self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        self._stack_limit = sys.maxsize if self.max_stack is None else self.max_stack
+        self._size_limit = sys.maxsize if self.max_size is None else self.max_size
+        # without a stack limit push is the plain append of the stack
+        if self.max_stack is None:
+            self.push = self.stack.append
+        else:
+            self.__dict__.pop('push', None)
+        # None disables the depth tracking of procedure calls
+        self._depth_limit = self.max_depth
+        self._update_next_check()
+
+    def _update_next_check(self):
+        next_check = sys.maxsize if self.max_steps is None else self.max_steps + 1
+        if self.deadline is not None:
+            next_check = min(next_check, self.steps + Interpreter.CLOCK_INTERVAL)
+        self._next_check = next_check
+
+    def check_limits(self):
+        """raise LimitExceeded if the step budget or the deadline is exhausted"""
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise LimitExceeded(f'step limit of {self.max_steps} exceeded')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise LimitExceeded(f'time limit of {self.timeout} seconds exceeded')
+        self._update_next_check()
+
+    def check_size(self, n: int):
+        """raise LimitExceeded if a list or string of length n would exceed the size limit"""
+        if n > self._size_limit:
+            raise LimitExceeded(f'size {n} exceeds the limit of {self.max_size}')
+
     def push(self, item):
         """put an item onto the top of the stack"""
+        if len(self.stack) >= self._stack_limit:
+            raise LimitExceeded(f'stack size of {self.max_stack} exceeded')
         self.stack.append(item)
     
     def push_n(self, n: int, item):
         """push an item at the n-th position of the stack"""
+        if len(self.stack) >= self._stack_limit:
+            raise LimitExceeded(f'stack size of {self.max_stack} exceeded')
         self.stack.insert(n, item)
     
+    def extend(self, items):
+        """put a sequence of items onto the top of the stack"""
+        if len(self.stack) + len(items) > self._stack_limit:
+            raise LimitExceeded(f'stack size of {self.max_stack} exceeded')
+        self.stack.extend(items)
+
     def pop(self, type=object):
         """pop an item from the stack an optionally check its type"""
         item = self.stack.pop()
@@ -70,14 +141,62 @@ class Interpreter:
     
     def peek(self, offset=0):
         return self.stack[offset - 1]
+
+    def require(self, n: int):
+        """make sure that the stack holds at least n items"""
+        if n < 0:
+            raise ValueError(f'negative count {n}')
+        if n > len(self.stack):
+            raise IndexError(f'stack holds {len(self.stack)} items, {n} requested')
+
+    def top(self, n: int):
+        """return a list of the n topmost items, the topmost last"""
+        self.require(n)
+        return self.stack[len(self.stack) - n:]
+
+    def index(self, n: int):
+        """return the n-th item counted from the top of the stack, starting at 0"""
+        if n < 0:
+            raise ValueError(f'negative index {n}')
+        self.require(n + 1)
+        return self.stack[-n - 1]
+
+    def copy(self, n: int):
+        """duplicate the n topmost items"""
+        self.extend(self.top(n))
+
+    def drop(self, n: int):
+        """remove the n topmost items"""
+        self.require(n)
+        del self.stack[len(self.stack) - n:]
+
+    def roll(self, n: int, j: int):
+        """roll the n topmost items by j positions towards the top"""
+        self.require(n)
+        if n == 0:
+            return
+        j %= n
+        if j == 0:
+            return
+        # copy only the shorter part of the window, the rest is moved in place
+        stack = self.stack
+        start = len(stack) - n
+        if j <= n - j:
+            moved = stack[len(stack) - j:]
+            del stack[len(stack) - j:]
+            stack[start:start] = moved
+        else:
+            moved = stack[start:start + n - j]
+            del stack[start:start + n - j]
+            stack.extend(moved)
     
     def append(self, item):
-        self.stack.append(item)
+        self.push(item)
 
-    def __get__(self, index):
+    def __getitem__(self, index):
         return self.stack[index]
     
-    def __set__(self, index, item):
+    def __setitem__(self, index, item):
         self.stack[index] = item
 
     def __len__(self):
@@ -94,9 +213,13 @@ class Interpreter:
         self.push(Interpreter.Marker())
 
     def pop_to_mark(self):
-        result = []
-        while not isinstance(self.peek(), Interpreter.Marker):
-            result.insert(0, self.pop())
+        for i in range(len(self.stack) - 1, -1, -1):
+            if isinstance(self.stack[i], Interpreter.Marker):
+                break
+        else:
+            raise IndexError('no mark on the stack')
+        result = self.stack[i + 1:]
+        del self.stack[i + 1:]
         return result
 
     def count_to_mark(self):
@@ -148,13 +271,25 @@ class Interpreter:
             self.sequence = sequence
     
         def __call__(self, interp):
-            for object in self.sequence:
-                interp.execute(object)
+            if interp._depth_limit is None:
+                for object in self.sequence:
+                    interp.execute(object)
+                return
+            interp.depth += 1
+            if interp.depth > interp._depth_limit:
+                interp.depth -= 1
+                raise LimitExceeded(f'procedure nesting depth of {interp.max_depth} exceeded')
+            try:
+                for object in self.sequence:
+                    interp.execute(object)
+            finally:
+                interp.depth -= 1
 
         def __repr__(self):
             return 'x' + str(self.sequence)
 
     def start_proc(self):
+        self.proc_starts.append(len(self.stack))
         self.mark()
         self.enter_deffered_mode()
     
@@ -162,6 +297,15 @@ class Interpreter:
         self.make_list()
         self.cvx()
         self.exit_deffered_mode()
+        if self.proc_starts:
+            self.proc_starts.pop()
+
+    def abort_procs(self):
+        """drop unfinished procedures and leave deffered mode"""
+        if self.proc_starts:
+            del self.stack[self.proc_starts[0]:]
+            self.proc_starts.clear()
+        self.deffered_mode = 0
 
     def cvlit(self):
         """convert to literatl"""
@@ -187,6 +331,9 @@ class Interpreter:
             stack.append(self.symbol)
 
     def execute(self, obj):
+        self.steps += 1
+        if self.steps >= self._next_check:
+            self.check_limits()
         if self.in_deffered_mode():
             if isinstance(obj, Interpreter.Symbol):
                 referee = self.lookup(obj)
@@ -215,10 +362,12 @@ class Interpreter:
             case Lexer.FALSE:
                 self.execute(False)
             case Lexer.STRING:
-                if token.text[0:3] == '"""':
-                    self.execute(token.text[3:-3])
+                prefix = STRING_PREFIX.match(token.text)
+                text = token.text[prefix.end():] if prefix else token.text
+                if text[0:3] in ('"""', "'''"):
+                    self.execute(text[3:-3])
                 else:
-                    self.execute(token.text[1:-1])
+                    self.execute(text[1:-1])
             case Lexer.INTEGER:
                 self.execute(int(token.text))
             case Lexer.FLOAT:
@@ -232,10 +381,23 @@ class Interpreter:
         if (self.verbose):
             print(*args)
     
+    def run(self, tokens):
+        """process a sequence of tokens"""
+        self.reset_limits()
+        self.depth = 0
+        try:
+            for token in tokens:
+                self.process_token(token)
+        except BaseException:
+            self.abort_procs()
+            raise
+
     def interpret(self, input):
         lexer = Lexer(input)
-        while True:
-            token = lexer.nextToken()
-            if token.type == Token.EOF:
-                break
-            self.process_token(token)
+        def tokens():
+            while True:
+                token = lexer.nextToken()
+                if token.type == Token.EOF:
+                    return
+                yield token
+        self.run(tokens())
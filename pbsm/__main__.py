@@ -6,8 +6,9 @@ import argparse
 __author__ = "Andreas Lehn"
 from .version import __version__
 
-from .__init__ import Interpreter
+from . import Interpreter, Exit
 from .core import commands as core_commands
+from .repl import Repl
 
 import importlib
 from antlr4 import FileStream, InputStream
@@ -21,9 +22,15 @@ def main():
     parser.add_argument('-m', '--module', nargs='*', help='extension module to be loaded')
     parser.add_argument('-s', '--show_stack', action='store_true', help='show contents of stack in interactive mode')
     parser.add_argument('--stack_length', type=int, help='sets the length of the stack (in character) shown in interactive mode', default=40)
+    parser.add_argument('-t', '--time', action='store_true', help='show execution time of each line in interactive mode')
+    parser.add_argument('--max_steps', type=int, help='maximum number of execution steps per input')
+    parser.add_argument('--max_stack', type=int, help='maximum number of items on the stack')
+    parser.add_argument('--max_depth', type=int, help='maximum nesting depth of procedures')
+    parser.add_argument('--max_size', type=int, help='maximum length of lists and strings created by array, add and mul')
+    parser.add_argument('--timeout', type=float, help='maximum execution time (in seconds) per input')
     args = parser.parse_args()
 
-    interpreter = Interpreter()
+    interpreter = Interpreter(max_steps=args.max_steps, max_stack=args.max_stack, max_depth=args.max_depth, max_size=args.max_size, timeout=args.timeout)
     interpreter.verbose = args.verbose
     if not args.nacked:
         interpreter.register(core_commands)
@@ -36,27 +43,18 @@ def main():
                 interpreter.log(f'module {m} loaded.')
             except (ModuleNotFoundError, AttributeError, TypeError) as err:
                 print(f'Error importing module:', err)
-    if args.command:
-        interpreter.log('executing command:', args.command)
-        interpreter.interpret(InputStream(args.command))
-    elif args.filename:
-        interpreter.log('executing file', args.filename)
-        interpreter.interpret(FileStream(args.filename))
-    else:
-        interpreter.log('entering interactive mode')
-        PROMPT = '> '
-        while True:
-            stack = ''
-            if args.show_stack:
-                stack = str(interpreter.stack)[-args.stack_length:]
-            prompt = stack + PROMPT
-            try:
-                line = input(prompt)
-                interpreter.interpret(InputStream(line))
-            except (EOFError, KeyboardInterrupt):
-                break
-            except (RuntimeError, KeyError, TypeError, IndexError, ValueError) as err:
-                print(type(err).__name__, ':', str(err), file=sys.stderr)
+    try:
+        if args.command:
+            interpreter.log('executing command:', args.command)
+            interpreter.interpret(InputStream(args.command))
+        elif args.filename:
+            interpreter.log('executing file', args.filename)
+            interpreter.interpret(FileStream(args.filename))
+        else:
+            interpreter.log('entering interactive mode')
+            Repl(interpreter, args.show_stack, args.stack_length, args.time).run()
+    except Exit as exit:
+        return exit.code
     return 0
 
 if __name__ == '__main__':
@@ -1,9 +1,15 @@
 # core extension of Python based stack machine
 
-import sys
+from . import Exit
+
+SEQUENCES = (str, bytes, list)
 
 def add(interp):
-    interp.push(interp.pop() + interp.pop())
+    b = interp.pop()
+    a = interp.pop()
+    if interp.max_size is not None and isinstance(a, SEQUENCES) and isinstance(b, SEQUENCES):
+        interp.check_size(len(a) + len(b))
+    interp.push(b + a)
 
 def sub(interp):
     o = interp.pop()
@@ -22,7 +28,14 @@ def mod(interp):
     interp.push(interp.pop() % divisor)
 
 def mul(interp):
-    interp.push(interp.pop() * interp.pop())
+    b = interp.pop()
+    a = interp.pop()
+    if interp.max_size is not None:
+        if isinstance(a, SEQUENCES) and isinstance(b, int):
+            interp.check_size(len(a) * b)
+        elif isinstance(b, SEQUENCES) and isinstance(a, int):
+            interp.check_size(len(b) * a)
+    interp.push(b * a)
 
 def power(interp):
     exp = interp.pop()
@@ -46,17 +59,19 @@ def exch(interp):
 def pop(interp):
     return interp.pop()
 
+def npop(interp):
+    interp.drop(interp.pop(int))
+
 def roll(interp):
-    times = interp.pop(int)
-    pos = -interp.pop(int)
-    if times < 0:
-        for i in range(-times):
-            o = interp.pop_n(pos)
-            interp.push(o)
-    elif times > 0:
-        for i in range(times):
-            o = interp.pop()
-            interp.push_n(pos, o)
+    j = interp.pop(int)
+    n = interp.pop(int)
+    interp.roll(n, j)
+
+def index(interp):
+    interp.push(interp.index(interp.pop(int)))
+
+def copy(interp):
+    interp.copy(interp.pop(int))
 
 def print_(interp):
     print(interp.pop())
@@ -116,10 +131,12 @@ def repeat(interp):
     n = interp.pop(int)
     exit_flag = Flag()
     cmd_idx = interp.register({'exit': exit_flag})
-    for _ in range(n):
-        interp.execute(op)
-        if exit_flag: break
-    interp.unregister(cmd_idx)
+    try:
+        for _ in range(n):
+            interp.execute(op)
+            if exit_flag: break
+    finally:
+        interp.unregister(cmd_idx)
 
 def for_(interp):
     op = interp.pop()
@@ -128,36 +145,42 @@ def for_(interp):
     first = interp.pop(int)
     exit_flag = Flag()
     cmd_idx = interp.register({'exit': exit_flag})
-    for i in range(first, last, step):
-        interp.push(i)
-        interp.execute(op)
-        if exit_flag: break
-    interp.unregister(cmd_idx)
+    try:
+        for i in range(first, last, step):
+            interp.push(i)
+            interp.execute(op)
+            if exit_flag: break
+    finally:
+        interp.unregister(cmd_idx)
 
 def loop(interp):
     op = interp.pop()
     exit_flag = Flag()
     cmd_idx = interp.register({'exit': exit_flag})
-    while not exit_flag:
-        interp.execute(op)
-    interp.unregister(cmd_idx)
+    try:
+        while not exit_flag:
+            interp.execute(op)
+    finally:
+        interp.unregister(cmd_idx)
 
 def forall(interp):
     op = interp.pop()
     array = interp.pop(list)
     exit_flag = Flag()
     cmd_idx = interp.register({'exit': exit_flag})
-    for o in array:
-        interp.push(o)
-        interp.execute(op)
-        if exit_flag: break
-    interp.unregister(cmd_idx)
+    try:
+        for o in array:
+            interp.push(o)
+            interp.execute(op)
+            if exit_flag: break
+    finally:
+        interp.unregister(cmd_idx)
 
 def exit(interp):
-    sys.exit()
+    raise Exit()
 
 def exit_with_code(interp):
-    sys.exit(interp.pop())
+    raise Exit(interp.pop())
 
 def get(interp):
     i = interp.pop(int)
@@ -172,6 +195,7 @@ def put(interp):
 
 def array(interp):
     n = interp.pop(int)
+    interp.check_size(n)
     interp.push([None] * n)
 
 def length(interp):
@@ -179,14 +203,13 @@ def length(interp):
 
 def aload(interp):
     array = interp.pop(list)
-    for o in array:
-        interp.push(o)
+    interp.extend(array)
     interp.push(array)
 
 def astore(interp):
     array = interp.pop(list)
-    for i in range(len(array)):
-        array[-(i + 1)] = interp.pop()
+    array[:] = interp.top(len(array))
+    interp.drop(len(array))
     interp.push(array)
 
 commands = {
@@ -209,7 +232,11 @@ commands = {
     'dup': dup,
     'exch': exch,
     'pop': pop,
+    'npop': npop,
     'roll': roll,
+    'index': index,
+    'copy': copy,
+    'ndup': copy,
     'print': print_,
     'pstack': pstack,
     'eq': eq,
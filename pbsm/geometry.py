@@ -0,0 +1,276 @@
+# geometry extension of Python based stack machine
+#
+# Vectors are numpy arrays, point sets, polygons and meshes keep their
+# coordinates in contiguous numpy buffers. All operators work on the whole
+# buffer at once.
+
+import math
+from itertools import chain
+
+import numpy as np
+
+# number of vertices or faces written to a file in one go
+CHUNK = 65536
+
+def as_coords(obj):
+    """convert a list of vectors into a contiguous (n, d) array of floats"""
+    coords = np.ascontiguousarray(obj, dtype=np.float64)
+    if coords.shape == (0,):
+        coords = coords.reshape(0, 3)
+    if coords.ndim != 2:
+        raise ValueError(f'expected a list of vectors, got shape {coords.shape}')
+    return coords
+
+def as_3d(coords):
+    """extend a 2d vector or an array of 2d vectors with z = 0"""
+    if coords.shape[-1] == 2:
+        coords = np.concatenate((coords, np.zeros(coords.shape[:-1] + (1,))), axis=-1)
+    if coords.shape[-1] != 3:
+        raise ValueError(f'expected 2d or 3d vectors, got {coords.shape[-1]}d')
+    return coords
+
+class Points:
+    """a set of points"""
+    def __init__(self, coords):
+        self.coords = as_coords(coords)
+
+    def map(self, f):
+        return type(self)(f(self.coords))
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)})'
+
+class Polygon(Points):
+    """a closed polygon, the vertices are in counterclockwise order"""
+
+class Mesh:
+    """a polygon mesh
+
+    The faces are stored in compressed form: the vertex indices of face i are
+    indices[offsets[i]:offsets[i + 1]].
+    """
+    def __init__(self, vertices, indices, offsets):
+        self.vertices = as_3d(as_coords(vertices))
+        self.indices = np.ascontiguousarray(indices, dtype=np.int64)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        if len(self.offsets) == 0 or self.offsets[0] != 0 or self.offsets[-1] != len(self.indices):
+            raise ValueError('offsets do not match the indices')
+        if np.any(np.diff(self.offsets) <= 0):
+            raise ValueError('a mesh must not contain empty faces')
+        if len(self.indices) and (self.indices.min() < 0 or self.indices.max() >= len(self.vertices)):
+            raise ValueError('vertex index out of range')
+
+    @staticmethod
+    def from_faces(vertices, faces):
+        counts = np.fromiter((len(face) for face in faces), dtype=np.int64, count=len(faces))
+        indices = np.fromiter(chain.from_iterable(faces), dtype=np.int64, count=int(counts.sum()))
+        return Mesh(vertices, indices, np.concatenate(([0], np.cumsum(counts))))
+
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def map(self, f):
+        return Mesh(f(self.vertices), self.indices, self.offsets)
+
+    def face_normals(self):
+        """calculate the face normals with Newell's method"""
+        starts = self.offsets[:-1]
+        following = np.arange(1, len(self.indices) + 1)
+        following[self.offsets[1:] - 1] = starts
+        v = self.vertices[self.indices]
+        return normalized(np.add.reduceat(np.cross(v, v[following]), starts, axis=0))
+
+    def vertex_normals(self):
+        """average the normals of the adjacent faces"""
+        normals = np.repeat(self.face_normals(), self.counts(), axis=0)
+        n = len(self.vertices)
+        result = np.stack([np.bincount(self.indices, normals[:, i], minlength=n) for i in range(3)], axis=1)
+        return normalized(result)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __repr__(self):
+        return f'Mesh({len(self.vertices)}, {len(self)})'
+
+def normalized(coords):
+    coords = np.asarray(coords, dtype=np.float64)
+    norm = np.linalg.norm(coords, axis=-1, keepdims=True)
+    return np.divide(coords, norm, out=np.zeros_like(coords), where=norm > 0)
+
+def transform(obj, f):
+    if isinstance(obj, (Points, Mesh)):
+        return obj.map(f)
+    return f(np.asarray(obj, dtype=np.float64))
+
+def rotation(axis, angle):
+    """rotation matrix around axis, angle in degrees"""
+    k = normalized(np.asarray(axis, dtype=np.float64))
+    a = math.radians(angle)
+    K = np.array([[0, -k[2], k[1]], [k[2], 0, -k[0]], [-k[1], k[0], 0]])
+    return np.eye(3) + math.sin(a) * K + (1 - math.cos(a)) * (K @ K)
+
+def vec2(interp):
+    y = interp.pop()
+    x = interp.pop()
+    interp.push(np.array([x, y], dtype=np.float64))
+
+def vec3(interp):
+    z = interp.pop()
+    y = interp.pop()
+    x = interp.pop()
+    interp.push(np.array([x, y, z], dtype=np.float64))
+
+def dot(interp):
+    b = interp.pop()
+    interp.push(float(np.dot(interp.pop(), b)))
+
+def cross(interp):
+    b = interp.pop()
+    interp.push(np.cross(interp.pop(), b))
+
+def normalize(interp):
+    interp.push(normalized(np.asarray(interp.pop(), dtype=np.float64)))
+
+def points(interp):
+    interp.push(Points(interp.pop(list)))
+
+def polygon(interp):
+    obj = interp.pop()
+    interp.push(Polygon(obj.coords if isinstance(obj, Points) else obj))
+
+def circle(interp):
+    radius = interp.pop()
+    n = interp.pop(int)
+    a = np.linspace(0.0, 2 * math.pi, n, endpoint=False)
+    interp.push(Polygon(np.stack((radius * np.cos(a), radius * np.sin(a), np.zeros(n)), axis=1)))
+
+def mesh(interp):
+    faces = interp.pop(list)
+    vertices = interp.pop()
+    if isinstance(vertices, Points):
+        vertices = vertices.coords
+    interp.push(Mesh.from_faces(vertices, faces))
+
+def vertices(interp):
+    interp.push(Points(interp.pop(Mesh).vertices))
+
+def translate(interp):
+    v = np.asarray(interp.pop(), dtype=np.float64)
+    interp.push(transform(interp.pop(), lambda coords: coords + v))
+
+def scale(interp):
+    s = np.asarray(interp.pop(), dtype=np.float64)
+    interp.push(transform(interp.pop(), lambda coords: coords * s))
+
+def rotate(interp):
+    angle = interp.pop()
+    axis = interp.pop()
+    m = rotation(axis, angle)
+    interp.push(transform(interp.pop(), lambda coords: as_3d(coords) @ m.T))
+
+def extrude(interp):
+    v = np.asarray(interp.pop(), dtype=np.float64)
+    base = as_3d(interp.pop(Points).coords)
+    n = len(base)
+    i = np.arange(n)
+    j = (i + 1) % n
+    bottom = i[::-1]
+    top = i + n
+    sides = np.stack((i, j, j + n, i + n), axis=1).ravel()
+    offsets = np.concatenate(([0, n, 2 * n], 2 * n + 4 * np.arange(1, n + 1)))
+    interp.push(Mesh(np.vstack((base, base + v)), np.concatenate((bottom, top, sides)), offsets))
+
+def merge(interp):
+    b = interp.pop(Mesh)
+    a = interp.pop(Mesh)
+    interp.push(Mesh(
+        np.vstack((a.vertices, b.vertices)),
+        np.concatenate((a.indices, b.indices + len(a.vertices))),
+        np.concatenate((a.offsets, b.offsets[1:] + len(a.indices)))))
+
+def normals(interp):
+    interp.push(Points(interp.pop(Mesh).face_normals()))
+
+def vertex_normals(interp):
+    interp.push(Points(interp.pop(Mesh).vertex_normals()))
+
+def write_obj_file(m, file):
+    for start in range(0, len(m.vertices), CHUNK):
+        chunk = m.vertices[start:start + CHUNK]
+        file.write(('v %.9g %.9g %.9g\n' * len(chunk)) % tuple(chunk.ravel().tolist()))
+    templates = {}
+    counts = m.counts()
+    for start in range(0, len(m), CHUNK):
+        c = counts[start:start + CHUNK].tolist()
+        for k in set(c) - templates.keys():
+            templates[k] = 'f' + ' %d' * k + '\n'
+        fmt = ''.join(map(templates.__getitem__, c))
+        indices = m.indices[m.offsets[start]:m.offsets[start + len(c)]] + 1
+        file.write(fmt % tuple(indices.tolist()))
+
+def write_ply_file(m, file):
+    counts = m.counts()
+    file.write((
+        'ply\n'
+        'format binary_little_endian 1.0\n'
+        f'element vertex {len(m.vertices)}\n'
+        'property float x\n'
+        'property float y\n'
+        'property float z\n'
+        f'element face {len(m)}\n'
+        'property list uchar int vertex_indices\n'
+        'end_header\n').encode('ascii'))
+    for start in range(0, len(m.vertices), CHUNK):
+        file.write(m.vertices[start:start + CHUNK].astype('<f4').tobytes())
+    for start in range(0, len(m), CHUNK):
+        stop = min(start + CHUNK, len(m))
+        first, last = m.offsets[start], m.offsets[stop]
+        c = counts[start:stop]
+        # every face is one count byte followed by four bytes per index
+        face = np.repeat(np.arange(stop - start), c)
+        buffer = np.empty((stop - start) + 4 * (last - first), dtype=np.uint8)
+        buffer[4 * (m.offsets[start:stop] - first) + np.arange(stop - start)] = c
+        position = 4 * np.arange(last - first) + face + 1
+        indices = m.indices[first:last].astype('<i4').view(np.uint8).reshape(-1, 4)
+        buffer[position[:, None] + np.arange(4)] = indices
+        file.write(buffer.tobytes())
+
+def write_obj(interp):
+    filename = interp.pop(str)
+    m = interp.pop(Mesh)
+    with open(filename, 'w') as file:
+        write_obj_file(m, file)
+
+def write_ply(interp):
+    filename = interp.pop(str)
+    m = interp.pop(Mesh)
+    if len(m) and m.counts().max() > 255:
+        raise ValueError('faces with more than 255 vertices cannot be written to PLY')
+    with open(filename, 'wb') as file:
+        write_ply_file(m, file)
+
+commands = {
+    'vec2': vec2,
+    'vec3': vec3,
+    'dot': dot,
+    'cross': cross,
+    'normalize': normalize,
+    'points': points,
+    'polygon': polygon,
+    'circle': circle,
+    'mesh': mesh,
+    'vertices': vertices,
+    'translate': translate,
+    'scale': scale,
+    'rotate': rotate,
+    'extrude': extrude,
+    'merge': merge,
+    'normals': normals,
+    'vertex_normals': vertex_normals,
+    'write_obj': write_obj,
+    'write_ply': write_ply
+}
@@ -0,0 +1,156 @@
+# interactive mode of Python based stack machine
+
+import re
+import sys
+import math
+import time
+import reprlib
+
+from antlr4 import InputStream, Token
+from antlr4.error.ErrorListener import ErrorListener
+from .Lexer import Lexer
+from . import STRING_PREFIX
+
+class Incomplete(Exception):
+    """raised by the lexer when the input ends inside a long string"""
+    def __init__(self, index):
+        super().__init__(index)
+        self.index = index
+
+# an unterminated long string is taken for a name, an empty string or fails to lex
+LONG_STRING_START = re.compile(f'(?:{STRING_PREFIX.pattern})?(\'\'\'|""")')
+
+class LexerErrorListener(ErrorListener):
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        index = recognizer._tokenStartCharIndex
+        if LONG_STRING_START.match(recognizer.inputStream.strdata, index):
+            raise Incomplete(index)
+        raise SyntaxError(f'line {line}:{column} {msg}')
+
+class StackRepr(reprlib.Repr):
+    """bounded representation of stack items, large items are cut before formatting"""
+
+    def repr_Procedure(self, x, level):
+        return 'x' + self.repr_list(x.sequence, level)
+
+    def repr_bytes(self, x, level):
+        return self.repr_str(x, level)
+
+    def repr_int(self, x, level):
+        # converting a huge int to decimal is quadratic, so estimate its length
+        digits = int(x.bit_length() * math.log10(2)) + 1
+        if digits > self.maxother:
+            return f'<int of about {digits} digits>'
+        return repr(x)
+
+class Repl:
+    """reads the input line by line and feeds complete constructs into the interpreter"""
+
+    PROMPT = '> '
+    CONTINUATION_PROMPT = '. '
+    OPEN = ('{', '[')
+    CLOSE = ('}', ']')
+
+    def __init__(self, interpreter, show_stack=False, stack_length=40, timing=False):
+        self.interpreter = interpreter
+        self.show_stack = show_stack
+        self.stack_length = stack_length
+        self.timing = timing
+        self.lexer = Lexer()
+        self.lexer.removeErrorListeners()
+        self.lexer.addErrorListener(LexerErrorListener())
+        self.repr = StackRepr()
+        self.repr.maxstring = self.repr.maxother = stack_length
+        self.reset()
+
+    def reset(self):
+        """drop all buffered input"""
+        self.pending = ''
+        self.tokens = []
+        self.depth = 0
+
+    def incomplete(self):
+        return bool(self.pending) or self.depth > 0
+
+    def render_stack(self):
+        """render the topmost items of the stack, at most stack_length characters"""
+        stack = self.interpreter.stack
+        parts = []
+        size = 2
+        i = len(stack)
+        while i > 0 and size < self.stack_length:
+            i -= 1
+            parts.append(self.repr.repr(stack[i]))
+            size += len(parts[-1]) + 2
+        text = ', '.join(reversed(parts)) + ']'
+        if i == 0:
+            text = '[' + text
+        return text[-self.stack_length:]
+
+    def prompt(self):
+        if self.incomplete():
+            return Repl.CONTINUATION_PROMPT
+        if self.show_stack:
+            return self.render_stack() + Repl.PROMPT
+        return Repl.PROMPT
+
+    def tokenize(self, text):
+        self.lexer.inputStream = InputStream(text)
+        while True:
+            token = self.lexer.nextToken()
+            if token.type == Token.EOF:
+                break
+            if token.channel == Token.DEFAULT_CHANNEL:
+                yield token
+
+    def feed(self, line):
+        """process a line of input, return True if the buffered input was executed"""
+        self.pending += line + '\n'
+        try:
+            for token in self.tokenize(self.pending):
+                if LONG_STRING_START.match(self.pending, token.start):
+                    if token.type != Lexer.STRING or not LONG_STRING_START.match(token.text):
+                        raise Incomplete(token.start)
+                if token.type == Lexer.NAME:
+                    if token.text in Repl.OPEN:
+                        self.depth += 1
+                    elif token.text in Repl.CLOSE:
+                        self.depth -= 1
+                self.tokens.append(token)
+            self.pending = ''
+        except Incomplete as incomplete:
+            self.pending = self.pending[incomplete.index:]
+            return False
+        except SyntaxError:
+            self.reset()
+            raise
+        if self.depth > 0:
+            return False
+        tokens = self.tokens
+        self.reset()
+        self.interpreter.run(tokens)
+        return True
+
+    def run(self):
+        """read and execute lines until the end of the input"""
+        while True:
+            try:
+                prompt = self.prompt()
+            except Exception:
+                prompt = Repl.PROMPT
+            try:
+                line = input(prompt)
+                start = time.perf_counter()
+                if self.feed(line) and self.timing:
+                    print(f'{(time.perf_counter() - start) * 1000:.3f} ms', file=sys.stderr)
+            except KeyboardInterrupt:
+                # discard the buffered input
+                print(file=sys.stderr)
+                self.reset()
+            except EOFError:
+                if self.incomplete():
+                    print('incomplete input discarded', file=sys.stderr)
+                break
+            except (SyntaxError, RuntimeError, KeyError, TypeError, IndexError, ValueError) as err:
+                self.reset()
+                print(type(err).__name__, ':', str(err), file=sys.stderr)
@@ -0,0 +1,25 @@
+import pytest
+from antlr4 import InputStream
+
+from pbsm import Interpreter
+from pbsm.core import commands as core_commands
+
+class Machine(Interpreter):
+    """interpreter with the core extension that evaluates source strings"""
+
+    def __init__(self, *extensions, **limits):
+        super().__init__(**limits)
+        self.register(core_commands)
+        for commands in extensions:
+            self.register(commands)
+
+    def evaluate(self, source, *items):
+        """push the items, interpret the source and return the stack"""
+        self.extend(list(items))
+        self.interpret(InputStream(source))
+        return self.stack
+
+@pytest.fixture
+def machine():
+    """factory for interpreters, takes extension command tables and limits"""
+    return Machine
@@ -0,0 +1,63 @@
+import pytest
+
+from pbsm import Interpreter
+
+@pytest.mark.parametrize('source, expected', [
+    ('1 2 3 4 3 1 roll', [1, 4, 2, 3]),
+    ('1 2 3 4 3 -1 roll', [1, 3, 4, 2]),
+    ('1 2 3 4 4 2 roll', [3, 4, 1, 2]),
+    ('1 2 3 4 3 7 roll', [1, 4, 2, 3]),
+    ('1 2 3 4 3 0 roll', [1, 2, 3, 4]),
+    ('1 2 3 4 0 5 roll', [1, 2, 3, 4]),
+])
+def test_roll(machine, source, expected):
+    assert machine().evaluate(source) == expected
+
+@pytest.mark.parametrize('n', [1, 2, 5, 8])
+@pytest.mark.parametrize('j', [-9, -5, -1, 1, 3, 4, 7, 17])
+def test_roll_matches_rotation(machine, n, j):
+    items = list(range(10))
+    window = items[10 - n:]
+    k = j % n
+    expected = items[:10 - n] + window[n - k:] + window[:n - k]
+    assert machine().evaluate(' '.join(map(str, items)) + f' {n} {j} roll') == expected
+
+def test_roll_underflow(machine):
+    with pytest.raises(IndexError):
+        machine().evaluate('1 2 3 4 1 roll')
+
+@pytest.mark.parametrize('source, expected', [
+    ('1 2 3 0 index', [1, 2, 3, 3]),
+    ('1 2 3 2 index', [1, 2, 3, 1]),
+    ('1 2 3 2 copy', [1, 2, 3, 2, 3]),
+    ('1 2 3 0 copy', [1, 2, 3]),
+    ('1 2 3 3 ndup', [1, 2, 3, 1, 2, 3]),
+    ('1 2 3 2 npop', [1]),
+    ('1 2 3 0 npop', [1, 2, 3]),
+])
+def test_stack_operators(machine, source, expected):
+    assert machine().evaluate(source) == expected
+
+@pytest.mark.parametrize('source, error', [
+    ('1 2 3 3 index', IndexError),
+    ('1 2 3 -1 index', ValueError),
+    ('1 2 3 -2 index', ValueError),
+    ('1 2 4 copy', IndexError),
+    ('1 2 -1 copy', ValueError),
+    ('1 2 3 npop', IndexError),
+])
+def test_stack_operator_errors(machine, source, error):
+    with pytest.raises(error):
+        machine().evaluate(source)
+
+def test_astore_and_aload(machine):
+    assert machine().evaluate('1 2 3 3 array astore') == [[1, 2, 3]]
+    assert machine().evaluate('0 [ 1 2 ] aload') == [0, 1, 2, [1, 2]]
+
+def test_lists_and_marks(machine):
+    assert machine().evaluate('0 [ 1 [ 2 ] 3 ]') == [0, [1, [2], 3]]
+    assert machine().evaluate('0 mark 1 2 counttomark')[-1] == 2
+    stack = machine().evaluate('0 mark 1 2 cleartomark')
+    assert len(stack) == 2 and isinstance(stack[1], Interpreter.Marker)
+    with pytest.raises(IndexError):
+        machine().evaluate('1 2 ]')
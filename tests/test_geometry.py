@@ -0,0 +1,124 @@
+import struct
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pbsm import geometry
+from pbsm.geometry import Mesh, Points, Polygon
+
+def faces(mesh):
+    return [mesh.indices[a:b].tolist() for a, b in zip(mesh.offsets[:-1], mesh.offsets[1:])]
+
+def test_extrude_topology(machine):
+    [mesh] = machine(geometry.commands).evaluate('5 1.0 circle 0 0 2 vec3 extrude')
+    assert len(mesh.vertices) == 10
+    assert len(mesh) == 7
+    assert mesh.counts().tolist() == [5, 5] + [4] * 5
+    # every edge is used exactly once in each direction, so the mesh is closed and consistently oriented
+    edges = Counter()
+    for face in faces(mesh):
+        for a, b in zip(face, face[1:] + face[:1]):
+            edges[a, b] += 1
+    assert all(count == 1 for count in edges.values())
+    assert all((b, a) in edges for a, b in edges)
+    assert len(mesh.vertices) - len(edges) // 2 + len(mesh) == 2
+
+def test_extrude_normals_point_outwards(machine):
+    [mesh] = machine(geometry.commands).evaluate('6 1.0 circle 0 0 2 vec3 extrude')
+    normals = mesh.face_normals()
+    assert np.allclose(normals[0], [0, 0, -1])
+    assert np.allclose(normals[1], [0, 0, 1])
+    centers = np.array([mesh.vertices[face].mean(axis=0) for face in faces(mesh)[2:]])
+    assert np.all(np.einsum('ij,ij->i', normals[2:], centers - [0, 0, 1]) > 0)
+
+def test_rotate_2d_input(machine):
+    [p] = machine(geometry.commands).evaluate('[ [ 1 0 ] [ 0 1 ] ] points 0 0 1 vec3 90 rotate')
+    assert isinstance(p, Points)
+    assert np.allclose(p.coords, [[0, 1, 0], [-1, 0, 0]])
+    [v] = machine(geometry.commands).evaluate('1 0 vec2 0 0 1 vec3 90 rotate')
+    assert np.allclose(v, [0, 1, 0])
+
+@pytest.mark.parametrize('face_list', [[[0, 1, 2], []], [[0, 1, 2], [], [0, 2, 1]]])
+def test_empty_faces_are_rejected(face_list):
+    with pytest.raises(ValueError):
+        Mesh.from_faces([[0, 0, 0], [1, 0, 0], [0, 1, 0]], face_list)
+
+@pytest.mark.parametrize('face_list', [[[0, 1, -1]], [[0, 1, 3]], [[0, 1, 2], [2, 1, 7]]])
+def test_vertex_indices_out_of_range_are_rejected(face_list):
+    with pytest.raises(ValueError, match='out of range'):
+        Mesh.from_faces([[0, 0, 0], [1, 0, 0], [0, 1, 0]], face_list)
+
+def test_empty_points(machine):
+    [p] = machine(geometry.commands).evaluate('[ ] points 1 2 3 vec3 translate')
+    assert len(p) == 0
+    assert p.coords.shape == (0, 3)
+
+def test_mesh_without_faces():
+    mesh = Mesh.from_faces([[0, 0, 0]], [])
+    assert mesh.face_normals().shape == (0, 3)
+    assert np.allclose(mesh.vertex_normals(), [[0, 0, 0]])
+
+def mixed_mesh():
+    """a strip of alternating triangles and quads"""
+    n = 11
+    vertices = [[x, y, 0.5 * x] for x in range(n) for y in (0, 1)]
+    face_list = []
+    for i in range(n - 1):
+        a, b, c, d = 2 * i, 2 * i + 2, 2 * i + 3, 2 * i + 1
+        face_list.append([a, b, c, d] if i % 2 else [a, b, c])
+    return Mesh.from_faces(vertices, face_list)
+
+def read_obj(path):
+    vertices, face_list = [], []
+    for line in path.read_text().splitlines():
+        kind, *values = line.split()
+        if kind == 'v':
+            vertices.append([float(v) for v in values])
+        elif kind == 'f':
+            face_list.append([int(v) - 1 for v in values])
+    return vertices, face_list
+
+def read_ply(path):
+    data = path.read_bytes()
+    end = data.index(b'end_header\n') + len(b'end_header\n')
+    header = data[:end].decode('ascii').splitlines()
+    assert header[:2] == ['ply', 'format binary_little_endian 1.0']
+    n_vertices = int(header[2].split()[-1])
+    n_faces = int(header[6].split()[-1])
+    vertices = np.frombuffer(data, dtype='<f4', count=3 * n_vertices, offset=end).reshape(-1, 3)
+    position = end + 12 * n_vertices
+    face_list = []
+    for _ in range(n_faces):
+        k = data[position]
+        face_list.append(list(struct.unpack_from(f'<{k}i', data, position + 1)))
+        position += 1 + 4 * k
+    assert position == len(data)
+    return vertices, face_list
+
+@pytest.mark.parametrize('chunk', [3, 4, geometry.CHUNK])
+def test_write_obj(machine, tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(geometry, 'CHUNK', chunk)
+    mesh = mixed_mesh()
+    path = tmp_path / 'mesh.obj'
+    machine(geometry.commands).evaluate('write_obj', mesh, str(path))
+    vertices, face_list = read_obj(path)
+    assert np.allclose(vertices, mesh.vertices)
+    assert face_list == faces(mesh)
+
+@pytest.mark.parametrize('chunk', [3, 4, geometry.CHUNK])
+def test_write_ply(machine, tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(geometry, 'CHUNK', chunk)
+    mesh = mixed_mesh()
+    path = tmp_path / 'mesh.ply'
+    machine(geometry.commands).evaluate('write_ply', mesh, str(path))
+    vertices, face_list = read_ply(path)
+    assert np.allclose(vertices, mesh.vertices)
+    assert face_list == faces(mesh)
+
+def test_write_ply_rejects_large_faces(machine, tmp_path):
+    path = tmp_path / 'mesh.ply'
+    with pytest.raises(ValueError):
+        machine(geometry.commands).evaluate('exch 0 0 1 vec3 extrude exch write_ply', Polygon(np.zeros((300, 3))), str(path))
+    assert not path.exists()
@@ -0,0 +1,116 @@
+import pytest
+
+from pbsm import LimitExceeded, Exit
+
+def test_limit_inside_procedure_resets_deffered_mode(machine):
+    interp = machine(max_steps=4)
+    with pytest.raises(LimitExceeded):
+        interp.evaluate('{ 1 2 3 4 5 6 }')
+    assert interp.stack == []
+    assert not interp.in_deffered_mode()
+    assert interp.evaluate('1 2 add') == [3]
+
+def test_limit_keeps_items_below_procedure(machine):
+    interp = machine(max_steps=8)
+    with pytest.raises(LimitExceeded):
+        interp.evaluate('1 2 { 3 [ 4 ] { 5 } 6 7 8 }')
+    assert interp.stack == [1, 2]
+    assert not interp.in_deffered_mode()
+
+@pytest.mark.parametrize('source', [
+    '1000000000 array',
+    '"a" 1000000000 *',
+    '1000000000 "a" *',
+    '[ 1 2 3 ] 400 mul',
+    '"aaaaaa" "aaaaaa" add',
+])
+def test_item_size_is_limited(machine, source):
+    interp = machine(max_size=10)
+    with pytest.raises(LimitExceeded):
+        interp.evaluate(source)
+
+def test_item_size_within_limit(machine):
+    interp = machine(max_size=10)
+    assert interp.evaluate('"ab" 3 * 2 array') == ['ababab', [None, None]]
+
+def test_stack_limit_does_not_limit_item_size(machine):
+    interp = machine(max_stack=10)
+    assert interp.evaluate('"ab" 6 *') == ['ab' * 6]
+
+def test_max_steps_stops_endless_loop(machine):
+    interp = machine(max_steps=1000)
+    with pytest.raises(LimitExceeded, match='step limit'):
+        interp.evaluate('{ } loop')
+    assert interp.steps == 1001
+
+def test_timeout_stops_endless_loop(machine):
+    interp = machine(timeout=0.05)
+    with pytest.raises(LimitExceeded, match='time limit'):
+        interp.evaluate('{ 1 pop } loop')
+
+def test_limits_are_reset_by_each_run(machine):
+    interp = machine(max_steps=10)
+    for _ in range(5):
+        interp.evaluate('1 pop')
+
+def test_max_stack(machine):
+    interp = machine(max_stack=10)
+    with pytest.raises(LimitExceeded, match='stack size'):
+        interp.evaluate('{ 1 } loop')
+    assert len(interp.stack) == 10
+    interp.max_stack = None
+    interp.stack.clear()
+    assert len(interp.evaluate('[ 1 2 3 4 5 6 7 8 9 10 11 12 ] aload')) == 13
+
+def test_max_depth_stops_recursion(machine):
+    interp = machine(max_depth=50)
+    with pytest.raises(LimitExceeded, match='nesting depth'):
+        interp.evaluate("'f { f } def f")
+    assert interp.evaluate("'g { 1 } def g") == [1]
+    assert interp.depth == 0
+
+NESTED_CALLS = """
+'a { 1 } def
+'b { a a } def
+'c { b b } def
+c
+"""
+
+def test_nesting_within_max_depth(machine):
+    interp = machine(max_depth=3)
+    assert interp.evaluate(NESTED_CALLS) == [1, 1, 1, 1]
+
+def test_nesting_beyond_max_depth(machine):
+    interp = machine(max_depth=2)
+    with pytest.raises(LimitExceeded, match='nesting depth'):
+        interp.evaluate(NESTED_CALLS)
+
+@pytest.mark.parametrize('source, code', [
+    ('exit', None),
+    ('3 exit_with_code', 3),
+    ('"failed" exit_with_code', 'failed'),
+])
+def test_exit_raises_exit(machine, source, code):
+    interp = machine()
+    with pytest.raises(Exit) as info:
+        interp.evaluate(source)
+    assert info.value.code == code
+
+def test_exit_leaves_loop(machine):
+    interp = machine()
+    assert interp.evaluate('0 { 1 add exit } loop') == [1]
+
+@pytest.mark.parametrize('source', [
+    '{ undefined } loop',
+    '3 { undefined } repeat',
+    '0 1 3 { undefined } for',
+    '[ 1 2 ] { undefined } forall',
+])
+def test_loops_unregister_exit_on_error(machine, source):
+    interp = machine()
+    tables = len(interp.symbol_tables)
+    with pytest.raises(KeyError):
+        interp.evaluate(source)
+    assert len(interp.symbol_tables) == tables
+    with pytest.raises(Exit):
+        interp.evaluate('exit')
@@ -0,0 +1,83 @@
+from pbsm import Interpreter
+from pbsm.repl import Repl
+
+def test_multi_line_procedure(machine):
+    repl = Repl(machine())
+    assert not repl.feed("'square {")
+    assert repl.prompt() == Repl.CONTINUATION_PROMPT
+    assert not repl.feed('  dup mul')
+    assert repl.feed('} def 3 square')
+    assert repl.interpreter.stack == [9]
+
+def test_multi_line_strings(machine):
+    repl = Repl(machine())
+    assert not repl.feed('"""a')
+    assert not repl.feed('b""" \'\'\'c')
+    assert repl.feed("d'''")
+    assert repl.interpreter.stack == ['a\nb', 'c\nd']
+
+def test_render_stack_is_bounded(machine):
+    repl = Repl(machine(), show_stack=True, stack_length=20)
+    stack = repl.interpreter.stack
+    assert repl.prompt() == '[]' + Repl.PROMPT
+    stack.extend([1, 2])
+    assert repl.prompt() == '[1, 2]' + Repl.PROMPT
+    stack.extend(range(100000))
+    stack.append(Interpreter.Procedure(list(range(1000000))))
+    stack.append(b'x' * 1000000)
+    prompt = repl.prompt()
+    assert len(prompt) == 20 + len(Repl.PROMPT)
+    assert prompt.endswith("xx']" + Repl.PROMPT)
+
+def test_procedure_is_rendered_shortened(machine):
+    repl = Repl(machine(), show_stack=True, stack_length=40)
+    repl.interpreter.push(Interpreter.Procedure(list(range(1000000))))
+    assert repl.render_stack() == '[x[0, 1, 2, 3, 4, 5, ...]]'
+
+def test_prefixed_multi_line_string(machine):
+    repl = Repl(machine())
+    assert not repl.feed("u'''a")
+    assert repl.feed("''' rb'b' R'c'")
+    assert repl.interpreter.stack == ['a\n', 'b', 'c']
+
+def test_huge_int_is_not_converted(machine):
+    repl = Repl(machine(), show_stack=True, stack_length=40)
+    repl.interpreter.push(10 ** 5000)
+    assert repl.prompt() == '[<int of about 5001 digits>]' + Repl.PROMPT
+    repl.interpreter.push(12345)
+    assert repl.prompt().endswith('12345]' + Repl.PROMPT)
+
+def feed_input(monkeypatch, *lines):
+    """let input() return the lines, strings are returned, exceptions raised"""
+    lines = iter(lines)
+    def input(prompt):
+        line = next(lines, EOFError)
+        if isinstance(line, str):
+            return line
+        raise line
+    monkeypatch.setattr('builtins.input', input)
+
+def test_run_survives_unprintable_stack(machine, monkeypatch, capsys):
+    repl = Repl(machine(), show_stack=True)
+    feed_input(monkeypatch, '2 20000 power', '1 pop')
+    repl.run()
+    assert repl.interpreter.stack == [2 ** 20000]
+    assert capsys.readouterr().err == ''
+
+def test_keyboard_interrupt_discards_buffered_input(machine, monkeypatch):
+    repl = Repl(machine())
+    feed_input(monkeypatch, '1 {', '2', KeyboardInterrupt, '3')
+    repl.run()
+    assert repl.interpreter.stack == [3]
+
+def test_eof_warns_about_incomplete_input(machine, monkeypatch, capsys):
+    repl = Repl(machine())
+    feed_input(monkeypatch, '1 {')
+    repl.run()
+    assert 'incomplete input discarded' in capsys.readouterr().err
+
+def test_time_is_shown_for_executed_lines(machine, monkeypatch, capsys):
+    repl = Repl(machine(), timing=True)
+    feed_input(monkeypatch, '{', '1 }')
+    repl.run()
+    assert capsys.readouterr().err.count(' ms') == 1